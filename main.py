@@ -1,26 +1,76 @@
 import network
-import socket
 import time
 from machine import Pin, reset
+from micropython import const
 import ntptime
 import uasyncio as asyncio
 import config
-import urequests
 import uos
+import errno
+import hashlib
+import binascii
+
+# Echo every log line to the serial console; errors are always echoed
+DEBUG = False
 
 # MOSFET control setup - replace with your actual GPIO pin
-MOSFET_PIN = 0  # Change this to the GPIO pin connected to your MOSFET gate
+MOSFET_PIN = const(0)  # Change this to the GPIO pin connected to your MOSFET gate
 mosfet = Pin(MOSFET_PIN, Pin.OUT)
 mosfet.off()  # Start with LED strip off
 
+# Onboard LED, used for status indications only
+led = Pin("LED", Pin.OUT)
+
 # Log file
 LOG_FILE = "system_log3.txt"
-MAX_LOG_SIZE = 10 * 1024  # Maximum log file size in bytes (e.g., 10 KB)
+MAX_LOG_SIZE = const(10 * 1024)  # Maximum log file size in bytes (e.g., 10 KB)
+_LOG_BUF = bytearray()  # Pending log lines not yet written to flash
+_LOG_THRESH = const(2048)  # Flush the log buffer once it holds this many bytes
+LOG_FLUSH_INTERVAL = const(30)  # Seconds between background log flushes
+_log_file = None  # Log file handle, kept open between flushes
+try:
+    _log_bytes = uos.stat(LOG_FILE)[6]  # Bytes in the log file, tracked as we flush
+except OSError:
+    _log_bytes = 0
+
+# Web server
+KEEP_ALIVE_TIMEOUT = const(5)  # Seconds an idle keep-alive connection stays open
+REQ_BUF_SIZE = const(512)  # Bytes of request head buffered per connection
+REQ_LINE_MAX = const(64)  # Bytes of the request line kept for routing
 
 # GitHub OTA Configuration
 GITHUB_REPO = "SWhardfish/PiPicoW_OTA"  # Replace with your GitHub repo
 BRANCH = "main"  # Branch to fetch updates from
 SCRIPT_NAME = "main.py"  # Script to update
+OTA_HOST = "raw.githubusercontent.com"  # Host serving the raw script
+ETAG_FILE = SCRIPT_NAME + ".etag"  # ETag of the last downloaded script
+DIGEST_FILE = SCRIPT_NAME + ".sha256"  # SHA-256 of the installed script
+OTA_CHUNK_SIZE = const(512)  # Bytes read per step while downloading an update
+OTA_TIMEOUT = const(60)  # Seconds a whole update check may take before it is abandoned
+# Request line and Host header, built once; HTTP/1.0 keeps the body un-chunked
+_OTA_REQ_PREFIX = ("GET /%s/%s/%s HTTP/1.0\r\nHost: %s\r\n" % (GITHUB_REPO, BRANCH, SCRIPT_NAME, OTA_HOST)).encode()
+
+# Daylight saving time offset cache: (UTC day number, offset in seconds)
+_cached_offset_day = (-1, 3600)
+
+
+# DST offset in seconds for a UTC epoch time
+def dst_offset_seconds(epoch):
+    t = time.gmtime(epoch)
+    return 7200 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25)) else 3600
+
+
+# Current local time, adjusted for daylight saving time
+def local_now():
+    global _cached_offset_day
+    now = time.time()
+    day, offset = _cached_offset_day
+    if now // 86400 != day:
+        # DST only changes at day boundaries, so the offset is computed once per day
+        offset = dst_offset_seconds(now)
+        _cached_offset_day = (now // 86400, offset)
+    # Shift the epoch before converting, so only one conversion is needed
+    return time.localtime(now + offset)
 
 
 # Check if file exists
@@ -33,12 +83,27 @@ def file_exists(path):
 
 
 # Function to normalize script content
-def normalize_code(code):
-    """Normalize code by stripping trailing spaces and converting line endings to '\n'."""
-    return "\n".join(line.rstrip() for line in code.splitlines())
-
+def normalize_chunk(data, spaces=0):
+    """
+    Normalize a chunk of script bytes by dropping '\r' and trailing spaces.
 
-def flash_led(times=None, delay=0.2, pattern=None):
+    :param data: Bytes to normalize.
+    :param spaces: Spaces left pending by the previous chunk.
+    :return: Tuple of (normalized bytes, spaces still pending).
+    """
+    # Let the C-level bytes methods do the scanning, one pass per line at most
+    lines = bytes(data).replace(b"\r", b"").split(b"\n")
+    if spaces:
+        lines[0] = b" " * spaces + lines[0]
+    # The last piece may continue in the next chunk, so hold back its spaces
+    last = lines.pop()
+    tail = last.rstrip(b" ")
+    lines = [line.rstrip(b" ") for line in lines]
+    lines.append(tail)
+    return b"\n".join(lines), len(last) - len(tail)
+
+
+async def flash_led(times=None, delay=0.2, pattern=None):
     """
     Flash the onboard LED with either a simple repeating pattern or a custom pattern.
     This is now only used for status indications, not for LED strip control.
@@ -48,119 +113,289 @@ def flash_led(times=None, delay=0.2, pattern=None):
     :param pattern: Custom pattern as a list of (state, duration) tuples.
                     Example: [(1, 5.0), (0, 0.5), (1, 0.1)]
     """
-    led = Pin("LED", Pin.OUT)  # Onboard LED for status only
     if pattern:
         # Use the custom pattern
         for state, duration in pattern:
             led.value(state)
-            time.sleep(duration)
+            await asyncio.sleep_ms(int(duration * 1000))
     elif times is not None:
         # Use the simple blinking pattern
+        delay_ms = int(delay * 1000)
         for _ in range(times):
             led.on()
-            time.sleep(delay)
+            await asyncio.sleep_ms(delay_ms)
             led.off()
-            time.sleep(delay)
+            await asyncio.sleep_ms(delay_ms)
     led.off()  # Ensure LED is off when done
 
 
+# Held while a check runs, so a second request can't download over the first
+_ota_lock = asyncio.Lock()
+
+
 # Function to check for OTA updates
-def check_for_updates():
-    try:
-        # GitHub API URL for the raw file
-        url = f"https://raw.githubusercontent.com/{GITHUB_REPO}/{BRANCH}/{SCRIPT_NAME}"
+async def check_for_updates():
+    if _ota_lock.locked():
+        log_event("Update check already in progress.")
+        return
+    async with _ota_lock:
+        # A stalled connection must not hang boot or hold the lock forever
+        try:
+            await asyncio.wait_for(_check_for_updates(), OTA_TIMEOUT)
+        except asyncio.TimeoutError:
+            log_event("OTA update check timed out.", level="ERROR")
 
-        # Fetch the latest version of the script
-        response = urequests.get(url)
 
-        if response.status_code == 200:
-            new_code = normalize_code(response.text)
+async def _check_for_updates():
+    try:
+        # Ask for the raw file only if it changed since the last download
+        etag = read_etag() if file_exists(SCRIPT_NAME) else None
+        reader, writer = await open_ota_request(etag)
 
-            # Check if the new code differs from the current code
-            if not file_exists(SCRIPT_NAME):
-                print("No existing script found. Applying update...")
-                update_script(new_code)
+        try:
+            # Parse the status line and pick the ETag and body length out of the headers
+            status = int((await reader.readline()).split(b" ", 2)[1])
+            new_etag = None
+            length = None
+            while True:
+                header = await reader.readline()
+                if not header or header == b"\r\n":
+                    break
+                name = header[:15].lower()
+                if name[:5] == b"etag:":
+                    new_etag = header[5:].strip()
+                elif name == b"content-length:":
+                    length = int(header[15:].strip())
+
+            if status == 304:
+                log_event("Checked for updates: Not modified since last check.")
+            elif status == 200:
+                # Stream the new script to a temp file, hashing it on the way
+                is_new = not file_exists(SCRIPT_NAME)
+                digest = await download_update(reader, length)
+                if is_new:
+                    log_event("No existing script found. Applying update...")
+                    update_script(new_etag, digest)
+                elif digest != script_digest():
+                    log_event("Update available. Applying update...")
+                    # Let the pattern finish before the reset cuts it short
+                    await flash_led(pattern=[(1, 5.0), (0, 0.5), (1, 0.1), (0, 0.5), (1, 5.0)])
+                    update_script(new_etag, digest)
+                else:
+                    uos.remove(SCRIPT_NAME + ".new")
+                    if new_etag:
+                        write_atomic(ETAG_FILE, new_etag)
+                    log_event("Checked for updates: No updates available.")
             else:
-                with open(SCRIPT_NAME, "r") as f:
-                    current_code = normalize_code(f.read())
-                if current_code != new_code:
-                    print("Update available. Applying update...")
-                    flash_led(pattern=[(1, 5.0), (0, 0.5), (1, 0.1), (0, 0.5), (1, 5.0)])
-                    t = time.localtime()
-                    offset = 2 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25) else 1
-                    adjusted_time = time.mktime(t) + offset * 3600
-                    log_event("Update available. Applying update...", time.localtime(adjusted_time))
-                    update_script(new_code)
-                    else:
-                    print("No updates available.")
-                    t = time.localtime()
-                    offset = 2 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25) else 1
-                    adjusted_time = time.mktime(t) + offset * 3600
-                    log_event("Checked for updates: No updates available.", time.localtime(adjusted_time))
-                    else:
-                    print(f"Failed to fetch update: {response.status_code}")
-                    t = time.localtime()
-                    offset = 2 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25) else 1
-                    adjusted_time = time.mktime(t) + offset * 3600
-                    log_event(f"Failed to fetch update: {response.status_code}", time.localtime(adjusted_time))
+                log_event(f"Failed to fetch update: {status}", level="ERROR")
+        finally:
+            await writer.aclose()
     except Exception as e:
-        print(f"Error during OTA update: {e}")
-        t = time.localtime()
-        offset = 2 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25) else 1
-        adjusted_time = time.mktime(t) + offset * 3600
-        log_event(f"Error during OTA update: {e}", time.localtime(adjusted_time))
+        log_event(f"Error during OTA update: {e}", level="ERROR")
 
-        # Function to update the script and restart
 
+# Send the GET for the raw script over TLS and return the stream pair
+async def open_ota_request(etag=None):
+    reader, writer = await asyncio.open_connection(OTA_HOST, 443, ssl=True)
+    try:
+        # Only the conditional header changes between checks
+        if etag:
+            await writer.awrite(_OTA_REQ_PREFIX + b"If-None-Match: " + etag + b"\r\n\r\n")
+        else:
+            await writer.awrite(_OTA_REQ_PREFIX + b"\r\n")
+    except Exception:
+        await writer.aclose()
+        raise
+    return reader, writer
+
+
+# Read the ETag of the last downloaded script, if any
+def read_etag():
+    if not file_exists(ETAG_FILE):
+        return None
+    with open(ETAG_FILE, "rb") as f:
+        return f.read().strip() or None
+
+
+# Write a small file via a temp file and rename, so a power loss never leaves it truncated
+def write_atomic(path, data):
+    with open(path + ".new", "wb") as f:
+        f.write(data)
+    uos.rename(path + ".new", path)
+
+
+# SHA-256 hex digest of a file, normalized the same way as downloads
+def sha256_file(path):
+    h = hashlib.sha256()
+    buf = bytearray(OTA_CHUNK_SIZE)
+    mv = memoryview(buf)
+    spaces = 0
+    with open(path, "rb") as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            chunk, spaces = normalize_chunk(mv[:n], spaces)
+            h.update(chunk)
+    return binascii.hexlify(h.digest())
 
-def update_script(new_code):
-    with open(SCRIPT_NAME, "w") as f:
-        f.write(new_code)
-    print("Update applied. Restarting...")
-    t = time.localtime()
-    offset = 2 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25)) else 1
-    adjusted_time = time.mktime(t) + offset * 3600
-    log_event("OTA update applied. Restarting...", time.localtime(adjusted_time))
-    machine.reset()  # Restart the device to apply the update
+
+# Digest of the installed script, computed and stored on first use
+def script_digest():
+    if file_exists(DIGEST_FILE):
+        with open(DIGEST_FILE, "rb") as f:
+            return f.read().strip()
+    digest = sha256_file(SCRIPT_NAME)
+    write_atomic(DIGEST_FILE, digest)
+    return digest
+
+
+# Download the new script to a temp file, hashing it as it arrives
+async def download_update(stream, length):
+    """
+    Stream the normalized response body into SCRIPT_NAME + ".new" in
+    fixed-size chunks, feeding each chunk to a SHA-256 hash on the way.
+
+    :param stream: Stream reader positioned at the start of the response body.
+    :param length: Content-Length of the body; anything else is a failed download.
+    :return: Hex SHA-256 digest of the normalized script.
+    """
+    h = hashlib.sha256()
+    buf = bytearray(OTA_CHUNK_SIZE)
+    mv = memoryview(buf)
+    spaces = 0
+    received = 0
+    done = False
+    try:
+        with open(SCRIPT_NAME + ".new", "wb") as f:
+            while True:
+                n = await stream.readinto(buf)
+                if not n:
+                    break
+                received += n
+                chunk, spaces = normalize_chunk(mv[:n], spaces)
+                f.write(chunk)
+                h.update(chunk)
+        # A connection closed early looks like EOF; never install a truncated script
+        if received != length:
+            raise ValueError(f"Incomplete download: {received} of {length} bytes")
+        done = True
+    finally:
+        # Don't leave a partial download behind on flash, even when cancelled
+        if not done:
+            try:
+                uos.remove(SCRIPT_NAME + ".new")
+            except OSError:
+                pass  # Never created; keep the original error
+    return binascii.hexlify(h.digest())
+
+
+# Function to update the script and restart
+def update_script(etag, digest):
+    # Rename over the old script so a power loss never leaves a partial file
+    uos.rename(SCRIPT_NAME + ".new", SCRIPT_NAME)
+    # Only record what is installed once it is actually in place
+    write_atomic(DIGEST_FILE, digest)
+    if etag:
+        write_atomic(ETAG_FILE, etag)
+    log_event("OTA update applied. Restarting...")
+    flush_log()
+    close_log()
+    reset()  # Restart the device to apply the update
 
 
 # Log event function
-def log_event(message, t=None):
+def log_event(message, t=None, level="INFO"):
     try:
         if t is None:
-            t = time.localtime()
-        formatted_time = "{:04}-{:02}-{:02} {:02}:{:02}:{:02}".format(*t)
-        log_message = f"{formatted_time} - {message}"
-        print(log_message)
-
-        # Check if log file exists and its size
-        if file_exists(LOG_FILE) and uos.stat(LOG_FILE)[6] >= MAX_LOG_SIZE:
-            print("Log file size exceeded, rotating log file.")
-            t = time.localtime()
-            offset = 2 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25)) else 1
-            adjusted_time = time.mktime(t) + offset * 3600
-            log_event("Log file size exceeded, rotating log file.", time.localtime(adjusted_time))
-            rotate_log_file()
-
-        # Append the message to the log file
-        with open(LOG_FILE, "a") as log_file:
-            log_file.write(log_message + "\n")
+            t = local_now()
+        # Format the whole line in one pass, newline included
+        line = "%04d-%02d-%02d %02d:%02d:%02d - %s\n" % (t[0], t[1], t[2], t[3], t[4], t[5], message)
+        # Serial output blocks while nothing drains it, so keep it for debugging
+        if DEBUG or level == "ERROR":
+            print(line, end="")
+
+        # Buffer the message; it is written to flash in batches, errors right away
+        _LOG_BUF.extend(line.encode())
+        if level == "ERROR" or len(_LOG_BUF) >= _LOG_THRESH:
+            flush_log()
 
     except Exception as e:
         print(f"Error logging event: {e}")
 
 
+# Write buffered log lines to the log file
+def flush_log():
+    global _log_bytes, _log_file
+    if not _LOG_BUF:
+        return
+    try:
+        # Rotate before writing if this batch would overflow the file, so the
+        # live log always holds the newest lines; the size is known without a stat
+        if _log_bytes and _log_bytes + len(_LOG_BUF) > MAX_LOG_SIZE:
+            if DEBUG:
+                print("Log file size exceeded, rotating log file.")
+            rotate_log_file()
+            _log_bytes = 0
+
+        # Reopening the file for every flush costs a directory walk and metadata write
+        if _log_file is None:
+            _log_file = open(LOG_FILE, "ab")
+        _log_file.write(_LOG_BUF)
+        _log_file.flush()
+        _log_bytes += len(_LOG_BUF)
+        _LOG_BUF[:] = b""
+    except Exception as e:
+        print(f"Error flushing log: {e}")
+        # Reopen on the next flush rather than reuse a handle that failed
+        try:
+            close_log()
+        except Exception:
+            _log_file = None
+        # Keep only the newest lines so a full flash can't exhaust the heap
+        if len(_LOG_BUF) > _LOG_THRESH:
+            _LOG_BUF[:] = _LOG_BUF[-_LOG_THRESH:]
+
+
+# Periodically flush the log buffer
+async def log_flusher():
+    while True:
+        await asyncio.sleep(LOG_FLUSH_INTERVAL)
+        flush_log()
+
+
+# Close the log file handle, if open
+def close_log():
+    global _log_file
+    if _log_file is not None:
+        _log_file.close()
+        _log_file = None
+
+
 # Rotate log file function
 def rotate_log_file():
     try:
+        close_log()
         # Create a backup of the current log file
         if file_exists(LOG_FILE):
             uos.rename(LOG_FILE, LOG_FILE + ".bak")
-            print("Log file rotated. Old log saved as system_log.txt.bak")
+            if DEBUG:
+                print("Log file rotated. Old log saved as system_log.txt.bak")
     except Exception as e:
         print(f"Error rotating log file: {e}")
 
 
+# Start associating and wait up to timeout_ms for the link to come up
+async def wifi_connect(wlan, ssid, password, timeout_ms=30000):
+    wlan.connect(ssid, password)
+    start = time.ticks_ms()
+    while time.ticks_diff(time.ticks_ms(), start) < timeout_ms:
+        if wlan.isconnected():
+            return True
+        await asyncio.sleep_ms(100)
+    return wlan.isconnected()
+
+
 # Connect to Wi-Fi using credentials from config.py
 async def connect_wifi():
     wlan = network.WLAN(network.STA_IF)
@@ -168,45 +403,39 @@ async def connect_wifi():
     wlan.config(pm=0)  # Disable Wi-Fi power saving
 
     if not wlan.isconnected():
-        print("Connecting to Wi-Fi...")
         log_event("Connecting to Wi-Fi...")
-        wlan.connect(config.WIFI_SSID, config.WIFI_PASSWORD)
-        for _ in range(30):  # Timeout after 30 seconds
-            if wlan.isconnected():
-                break
-            await asyncio.sleep(1)
-        else:
-            print("Failed to connect to Wi-Fi")
-            log_event("Failed to connect to Wi-Fi")
+        if not await wifi_connect(wlan, config.WIFI_SSID, config.WIFI_PASSWORD):
+            log_event(f"Failed to connect to Wi-Fi (status {wlan.status()})", level="ERROR")
             return None
 
-    print("Connected to Wi-Fi")
     ip_address = wlan.ifconfig()[0]  # Extract IP address
-    print("Network config:", wlan.ifconfig())
+    if DEBUG:
+        print("Network config:", wlan.ifconfig())
     log_event(f"Connected to Wi-Fi, IP address: {ip_address}")
-    flash_led(times=7, delay=0.1)
+    await flash_led(times=7, delay=0.1)
     return wlan
 
 
+# Set when a socket operation finds the network gone
+wifi_down = asyncio.Event()
+
+
 # Monitor Wi-Fi connection
 async def monitor_wifi(wlan, ssid, password):
     while True:
         if not wlan.isconnected():
-            print("Wi-Fi disconnected! Reconnecting...")
             log_event("Wi-Fi disconnected, attempting reconnection")
-            wlan.connect(config.WIFI_SSID, config.WIFI_PASSWORD)
-            for _ in range(30):  # Timeout after 30 seconds
-                if wlan.isconnected():
-                    break
-                await asyncio.sleep(1)
-            if wlan.isconnected():
-                print("Wi-Fi reconnected!")
+            if await wifi_connect(wlan, ssid, password):
                 log_event("Wi-Fi reconnected")
-                flash_led(times=3, delay=0.5)
+                await flash_led(times=3, delay=0.5)
             else:
-                print("Reconnection failed")
-                log_event("Wi-Fi reconnection failed")
-        await asyncio.sleep(10)  # Check every 10 seconds
+                log_event(f"Wi-Fi reconnection failed (status {wlan.status()})", level="ERROR")
+        # Check every 10 seconds, or sooner if a handler saw the link drop
+        try:
+            await asyncio.wait_for(wifi_down.wait(), 10)
+        except asyncio.TimeoutError:
+            pass
+        wifi_down.clear()
 
 
 # Synchronize time using NTP with retry
@@ -216,70 +445,74 @@ async def sync_time(max_retries=3, retry_delay=5):
         try:
             # Attempt to synchronize time
             ntptime.settime()
-            t = time.localtime()
-            offset = 2 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25)) else 1
-            adjusted_time = time.mktime(t) + offset * 3600
-            log_event("Time synchronized with NTP", time.localtime(adjusted_time))
-            flash_led(times=3, delay=0.3)
+            log_event("Time synchronized with NTP")
+            await flash_led(times=3, delay=0.3)
             return  # Exit the function if successful
         except Exception as e:
             retries += 1
-            log_event(f"Error synchronizing time (attempt {retries}): {e}")
+            log_event(f"Error synchronizing time (attempt {retries}): {e}", level="ERROR")
             if retries < max_retries:
                 await asyncio.sleep(retry_delay)  # Wait before retrying
             else:
                 # Log final failure after exhausting retries
-                t = time.localtime()
-                offset = 2 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25)) else 1
-                adjusted_time = time.mktime(t) + offset * 3600
-                log_event("Failed to synchronize time after multiple attempts", time.localtime(adjusted_time))
-                flash_led(times=5, delay=0.3)  # Indicate failure with 5 LED flashes
-
-
-# Serve HTTP requests
-async def serve(client):
-    try:
-        request = client.recv(1024).decode("utf-8")
-        if "GET /led/on" in request:
-            mosfet.on()
-            t = time.localtime()
-            offset = 2 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25)) else 1
-            adjusted_time = time.mktime(t) + offset * 3600
-            log_event("LED Strip turned ON", time.localtime(adjusted_time))
-            response = "HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n<h1>LED Strip ON</h1>"
-            client.send(response)
-        elif "GET /led/off" in request:
-            mosfet.off()
-            t = time.localtime()
-            offset = 2 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25)) else 1
-            adjusted_time = time.mktime(t) + offset * 3600
-            log_event("LED Strip turned OFF", time.localtime(adjusted_time))
-            response = "HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n<h1>LED Strip OFF</h1>"
-            client.send(response)
-        elif "GET /log" in request:
-            serve_log(client)
-        elif "GET /ota-update" in request:
-            try:
-                # Trigger the OTA update check
-                t = time.localtime()
-                offset = 2 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25)) else 1
-                adjusted_time = time.mktime(t) + offset * 3600
-                log_event("Manual OTA update check triggered via web.", time.localtime(adjusted_time))
-                update_status = check_for_updates()
-                response = f"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n\r\n{update_status}"
-            except Exception as e:
-                t = time.localtime()
-                offset = 2 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25)) else 1
-                adjusted_time = time.mktime(t) + offset * 3600
-                log_event(f"Error during manual OTA update: {e}", time.localtime(adjusted_time))
-                response = "HTTP/1.1 500 Internal Server Error\r\nContent-Type: text/plain\r\n\r\nError checking for updates."
-            client.send(response)
-        else:
-            response = """\
-HTTP/1.1 200 OK
-Content-Type: text/html; charset=utf-8
-
-<!DOCTYPE html>
+                log_event("Failed to synchronize time after multiple attempts", level="ERROR")
+                await flash_led(times=5, delay=0.3)  # Indicate failure with 5 LED flashes
+
+
+# Build an HTTP response header; Content-Length lets the connection be reused
+def http_header(length, content_type="text/html", status="200 OK", headers=""):
+    return "HTTP/1.1 {}\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: keep-alive\r\n{}\r\n".format(
+        status, content_type, length, headers).encode()
+
+
+# Build a complete HTTP response for a body held in memory
+def http_response(body, content_type="text/html", status="200 OK", headers=""):
+    return http_header(len(body), content_type, status, headers) + body
+
+
+# Scratch buffer for the plain-text header sent before a streamed body. The
+# fixed prefix is written once; each use only fills in the length and tail.
+# Stream writes copy what they can't send before yielding, so no lock is needed.
+_TX_HEAD = b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nContent-Length: "
+_TX_TAIL = b"\r\nConnection: keep-alive\r\n\r\n"
+_TXBUF = bytearray(len(_TX_HEAD) + 10 + len(_TX_TAIL))  # Room for a 10-digit length
+_TX_MV = memoryview(_TXBUF)
+_TXBUF[:len(_TX_HEAD)] = _TX_HEAD
+# Chunk buffer for streamed bodies, shared the same way
+_TX_BODY = bytearray(512)
+_TX_BODY_MV = memoryview(_TX_BODY)
+
+
+# Format a text/plain header for length body bytes into _TXBUF, returning its size
+def format_text_header(length):
+    # Count the digits, then write them right to left without building a string
+    end = len(_TX_HEAD) + 1
+    v = length
+    while v >= 10:
+        v //= 10
+        end += 1
+    i = end
+    while True:
+        i -= 1
+        _TXBUF[i] = 0x30 + length % 10  # ASCII '0'
+        length //= 10
+        if not length:
+            break
+    _TXBUF[end:end + len(_TX_TAIL)] = _TX_TAIL
+    return end + len(_TX_TAIL)
+
+
+# Static responses, built once at import and sent as-is
+_RESP_LED_ON = http_response(b"<h1>LED Strip ON</h1>")
+_RESP_LED_OFF = http_response(b"<h1>LED Strip OFF</h1>")
+_RESP_STATUS_ON = http_response(b"on", "text/plain")
+_RESP_STATUS_OFF = http_response(b"off", "text/plain")
+_RESP_LOG_NOT_FOUND = http_response(b"Log file not found.", "text/plain", "404 Not Found")
+_RESP_LOG_ERROR = http_response(b"An error occurred.", "text/plain", "500 Internal Server Error")
+_RESP_OTA_QUEUED = http_response(b"Update check queued.", "text/plain")
+
+# Landing page
+_INDEX_BODY = b"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
@@ -412,55 +645,154 @@ Content-Type: text/html; charset=utf-8
 </body>
 </html>
 """
-            client.send(response)
+# Browsers revalidate the cached page with this ETag and get a bodiless 304
+_INDEX_ETAG = b'"' + binascii.hexlify(hashlib.sha256(_INDEX_BODY).digest()[:8]) + b'"'
+_INDEX_PAGE = http_response(
+    _INDEX_BODY,
+    "text/html; charset=utf-8",
+    headers="Cache-Control: public, max-age=3600\r\nETag: {}\r\n".format(_INDEX_ETAG.decode()),
+)
+_RESP_NOT_MODIFIED = (
+    b"HTTP/1.1 304 Not Modified\r\nETag: " + _INDEX_ETAG + b"\r\nConnection: keep-alive\r\n\r\n"
+)
+del _INDEX_BODY
+
+
+# Read one request head into buf, returning (head length, bytes read); (0, 0) on EOF
+async def read_request(reader, buf, mv):
+    n = 0
+    while True:
+        got = await reader.readinto(mv[n:])
+        if not got:
+            return 0, 0
+        # The terminator may straddle reads, so look 3 bytes back into the old data
+        start = max(n - 3, 0)
+        end = bytes(mv[start:n + got]).find(b"\r\n\r\n")
+        n += got
+        if end >= 0:
+            return start + end + 4, n
+        if n == len(buf):
+            # Head larger than the buffer: keep the request line, drop the rest
+            buf[REQ_LINE_MAX:REQ_LINE_MAX + 3] = buf[n - 3:n]
+            n = REQ_LINE_MAX + 3
+
+
+# Serve HTTP requests
+async def serve(reader, writer):
+    # One receive buffer per connection, reused for every request on it
+    buf = bytearray(REQ_BUF_SIZE)
+    mv = memoryview(buf)
+    try:
+        # Keep serving requests on this connection until the client goes idle
+        while True:
+            try:
+                n, got = await asyncio.wait_for(read_request(reader, buf, mv), KEEP_ALIVE_TIMEOUT)
+            except asyncio.TimeoutError:
+                break
+            if not n:
+                break
+            # Route on the exact path from the request line; anything else gets the page
+            parts = bytes(mv[:min(n, REQ_LINE_MAX)]).split(b" ", 2)
+            handler = None
+            if len(parts) > 1 and parts[0] == b"GET":
+                handler = _ROUTES.get(parts[1])
+            if handler is None:
+                handler = serve_index
+            await handler(writer, mv[:n])
+            if got > n:
+                # A request body or pipelined request followed; close rather than misparse it
+                break
+    except OSError as e:
+        if e.errno == errno.ENOTCONN:
+            wifi_down.set()  # Wake monitor_wifi instead of waiting for its next check
+        # Usually the client dropping the connection, so don't force a flash write
+        log_event(f"Connection error: {e}")
     except Exception as e:
-        log_event(f"Error: {e}", time.localtime())
+        log_event(f"Error: {e}", level="ERROR")
     finally:
-        client.close()
+        await writer.aclose()
+
+
+# Route handlers; each takes the writer and the raw request head
+async def serve_led_on(writer, head):
+    mosfet.on()
+    log_event("LED Strip turned ON")
+    await writer.awrite(_RESP_LED_ON)
+
+
+async def serve_led_off(writer, head):
+    mosfet.off()
+    log_event("LED Strip turned OFF")
+    await writer.awrite(_RESP_LED_OFF)
+
+
+async def serve_led_status(writer, head):
+    # Polled by the page to colour its status indicator
+    await writer.awrite(_RESP_STATUS_ON if mosfet.value() else _RESP_STATUS_OFF)
+
+
+async def serve_ota_update(writer, head):
+    # Run the check in the background; the result goes to the log
+    log_event("Manual OTA update check triggered via web.")
+    asyncio.create_task(check_for_updates())
+    await writer.awrite(_RESP_OTA_QUEUED)
+
+
+async def serve_index(writer, head):
+    if _INDEX_ETAG in bytes(head):
+        # The browser already has this version of the page
+        await writer.awrite(_RESP_NOT_MODIFIED)
+    else:
+        await writer.awrite(_INDEX_PAGE)
 
 
 # Serve log function
-def serve_log(client):
+async def serve_log(writer, head):
+    flush_log()
+    if not file_exists(LOG_FILE):
+        log_event("Log requested but the log file does not exist.")
+        await writer.awrite(_RESP_LOG_NOT_FOUND)
+        return
+
+    sent = False  # Once the header is out, an error can't be answered in-band
     try:
-        if not file_exists(LOG_FILE):
-            raise FileNotFoundError("Log file does not exist.")
+        # Stream the log in fixed-size chunks rather than reading it whole
+        with open(LOG_FILE, "rb") as log_file:
+            size = uos.stat(LOG_FILE)[6]
+            await writer.awrite(_TX_MV[:format_text_header(size)])
+            sent = True
+            # Send exactly size bytes; lines flushed meanwhile wait for the next request
+            while size:
+                n = log_file.readinto(_TX_BODY_MV[:min(size, len(_TX_BODY))])
+                if not n:
+                    # The client would wait forever for the rest of the body
+                    raise OSError("Log file shrank while being sent")
+                await writer.awrite(_TX_BODY_MV[:n])
+                size -= n
+    except Exception as e:
+        if sent:
+            raise  # Let serve close the connection; the response is already framed
+        log_event(f"Error serving log: {e}", level="ERROR")
+        await writer.awrite(_RESP_LOG_ERROR)
 
-        with open(LOG_FILE, "r") as log_file:
-            logs = log_file.read()
-        response = f"""\
-HTTP/1.1 200 OK
-Content-Type: text/plain
 
-{logs}
-"""
-        client.send(response)
-    except FileNotFoundError as e:
-        print(f"Error serving log: {e}")
-        response = "HTTP/1.1 404 Not Found\r\nContent-Type: text/plain\r\n\r\nLog file not found."
-        client.send(response)
-    except Exception as e:
-        print(f"Error serving log: {e}")
-        response = "HTTP/1.1 500 Internal Server Error\r\nContent-Type: text/plain\r\n\r\nAn error occurred."
-        client.send(response)
+# Request paths and their handlers
+_ROUTES = {
+    b"/led/on": serve_led_on,
+    b"/led/off": serve_led_off,
+    b"/led/status": serve_led_status,
+    b"/log": serve_log,
+    b"/ota-update": serve_ota_update,
+}
 
 
 # Start the web server
 async def start_web_server():
-    addr = socket.getaddrinfo("0.0.0.0", 80)[0][-1]
-    s = socket.socket()
-    s.bind(addr)
-    s.listen(1)
-    print("Web server listening on", addr)
-    t = time.localtime()
-    offset = 2 if (3 <= t[1] <= 10 and not (t[1] == 3 and t[2] < 25) and not (t[1] == 10 and t[2] >= 25)) else 1
-    adjusted_time = time.mktime(t) + offset * 3600
-    log_event("Web server started", time.localtime(adjusted_time))
-    flash_led(times=2, delay=1.0)
-
-    while True:
-        client, addr = s.accept()
-        print("Client connected from", addr)
-        await serve(client)
+    # Connections are dispatched by the scheduler, so other tasks keep running
+    server = await asyncio.start_server(serve, "0.0.0.0", 80, backlog=5)
+    log_event("Web server listening on port 80")
+    await flash_led(times=2, delay=1.0)
+    return server
 
 
 # Main async function
@@ -472,7 +804,10 @@ async def main():
         return
 
     # Check for updates before starting the main app
-    check_for_updates()
+    await check_for_updates()
+
+    # Start periodic log flushing
+    asyncio.create_task(log_flusher())
 
     # Start Wi-Fi monitoring
     asyncio.create_task(monitor_wifi(wlan, config.WIFI_SSID, config.WIFI_PASSWORD))
@@ -483,11 +818,14 @@ async def main():
 
     # Start the web server
     await asyncio.sleep(1)
-    await start_web_server()
+    server = await start_web_server()
+    await server.wait_closed()
 
 
 # Run the main async loop
 try:
     asyncio.run(main())
 except KeyboardInterrupt:
+    flush_log()
+    close_log()
     print("Program terminated")
\ No newline at end of file